@@ -7,26 +7,28 @@ Saves and loads token.json to avoid re-authenticating on every run.
 
 import os
 import json
-from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.exceptions import RefreshError
 
 
 # Gmail API scopes required for the application
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 
+# Credentials from the last successful authenticate() call in this process
+_CREDS_CACHE = None
+
 
 def authenticate():
     """
     Authenticate with Gmail API using OAuth 2.0.
     
     This function:
-    1. Loads credentials.json (from Google Cloud Console)
-    2. Checks for existing token.json
-    3. If token exists and is valid, uses it
-    4. If not, initiates OAuth flow and saves token
-    5. Returns authenticated Credentials object
+    1. Returns the credentials cached in this process if still valid
+    2. Loads credentials.json (from Google Cloud Console)
+    3. Checks for existing token.json
+    4. If token exists and is valid, uses it
+    5. If not, initiates OAuth flow and saves token
+    6. Caches and returns authenticated Credentials object
     
     Returns:
         Credentials: Authenticated credentials object for Gmail API
@@ -35,7 +37,13 @@ def authenticate():
         FileNotFoundError: If credentials.json is not found
         RefreshError: If token refresh fails
     """
-    creds = None
+    global _CREDS_CACHE
+    
+    # Reuse credentials already loaded in this process
+    if _CREDS_CACHE is not None and _CREDS_CACHE.valid:
+        return _CREDS_CACHE
+    
+    creds = _CREDS_CACHE
     token_file = 'token.json'
     credentials_file = 'credentials.json'
     
@@ -46,8 +54,9 @@ def authenticate():
             "Please download it from Google Cloud Console and place it in the project root."
         )
     
-    # Load existing token if available
-    if os.path.exists(token_file):
+    # Load existing token if available (expired cached credentials are
+    # refreshed below without re-reading the file)
+    if creds is None and os.path.exists(token_file):
         try:
             creds = Credentials.from_authorized_user_file(token_file, SCOPES)
         except (ValueError, json.JSONDecodeError) as e:
@@ -58,13 +67,20 @@ def authenticate():
     # If there are no (valid) credentials available, let the user log in
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
+            # Only needed for refreshing, so imported on demand
+            from google.auth.transport.requests import Request
+            
             try:
                 creds.refresh(Request())
             except RefreshError:
                 print("Token expired and refresh failed. Initiating new OAuth flow...")
                 creds = None
+                _CREDS_CACHE = None
         
         if not creds:
+            # Only needed when no usable token exists, so imported on demand
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            
             flow = InstalledAppFlow.from_client_secrets_file(
                 credentials_file, SCOPES
             )
@@ -75,4 +91,5 @@ def authenticate():
             token.write(creds.to_json())
         print(f"Authentication successful. Token saved to {token_file}")
     
+    _CREDS_CACHE = creds
     return creds
@@ -6,7 +6,7 @@ Designed to be extensible for LLM-based classification in the future.
 """
 
 import os
-from dotenv import load_dotenv
+import re2
 
 
 class EmailClassifier:
@@ -15,11 +15,9 @@ class EmailClassifier:
     def __init__(self):
         """
         Initialize the email classifier with spam keywords.
-        Loads environment variables for potential LLM API keys.
+        Environment variables (e.g. future LLM API keys) are expected to be
+        loaded by the caller.
         """
-        # Load environment variables (for future LLM integration)
-        load_dotenv()
-        
         # Spam keywords for keyword-based classification
         self.spam_keywords = [
             'urgent',
@@ -44,6 +42,26 @@ class EmailClassifier:
             'don\'t miss out'
         ]
         
+        # Keywords are static, so lowercase them and precompute the
+        # per-match confidence weight (2.0 / total_keywords) once
+        self._spam_keywords_lower = tuple(k.lower() for k in self.spam_keywords)
+        self._inv_total = 2.0 / len(self.spam_keywords) if self.spam_keywords else 0.0
+        
+        # Confidence saturates at 1.0 once half the keywords match, so
+        # scanning can stop after that many distinct matches
+        self._saturation_matches = (len(self.spam_keywords) + 1) // 2
+        
+        # Compile the keywords into a case-insensitive RE2 set. A single
+        # linear-time Match() pass reports the index of every keyword present,
+        # including keywords that overlap or share a prefix. Keywords are
+        # ASCII, so raw body bytes are matched without decoding them as UTF-8.
+        options = re2.Options()
+        options.case_sensitive = False
+        self._spam_set = re2.Set.SearchSet(options)
+        for keyword in self._spam_keywords_lower:
+            self._spam_set.Add(re2.escape(keyword))
+        self._spam_set.Compile()
+        
         # Optional: Load LLM API keys for future integration
         # self.openai_api_key = os.getenv('OPENAI_API_KEY')
         # self.anthropic_api_key = os.getenv('ANTHROPIC_API_KEY')
@@ -54,7 +72,7 @@ class EmailClassifier:
         
         Args:
             subject (str): Email subject line
-            body (str): Email body content
+            body (str or bytes): Email body content
             
         Returns:
             tuple: (is_spam: bool, confidence: float)
@@ -74,35 +92,92 @@ class EmailClassifier:
         # Current implementation: Keyword-based matching
         return self._classify_with_keywords(subject, body)
     
+    def analyze_emails(self, emails):
+        """
+        Analyze several emails at once.
+        
+        Args:
+            emails (list): List of (subject, body) tuples
+            
+        Returns:
+            list: One (is_spam, confidence) tuple per email, in input order
+        """
+        return self._classify_batch_with_keywords(emails)
+    
     def _classify_with_keywords(self, subject, body):
         """
         Classify email using keyword matching.
         
         Args:
             subject (str): Email subject line
-            body (str): Email body content
+            body (str or bytes): Email body content
             
         Returns:
             tuple: (is_spam: bool, confidence: float)
         """
-        # Combine subject and body for analysis
-        text = f"{subject} {body}".lower()
-        
-        # Count keyword matches
-        matches = sum(1 for keyword in self.spam_keywords if keyword.lower() in text)
+        # Scan subject and body separately rather than copying them into
+        # one combined string, and count distinct keywords found. The body
+        # is skipped if the subject alone already saturates confidence.
+        keywords = self._find_keywords(subject, set())
+        if len(keywords) < self._saturation_matches:
+            self._find_keywords(body, keywords)
+        matches = len(keywords)
         
         # Calculate confidence based on number of matches
         # More matches = higher confidence
         # Formula: min(1.0, (matches / total_keywords) * 2.0)
         # This gives higher weight to matches (multiplier of 2.0)
-        total_keywords = len(self.spam_keywords)
-        confidence = min(1.0, (matches / total_keywords) * 2.0) if total_keywords > 0 else 0.0
+        confidence = min(1.0, matches * self._inv_total)
         
         # Classify as spam if at least one keyword matches
         is_spam = matches > 0
         
         return is_spam, confidence
     
+    def _classify_batch_with_keywords(self, emails):
+        """
+        Classify several emails with keyword matching.
+        
+        Each field is scanned once by the RE2 set, which already runs in C in
+        a single pass, so joining all emails into one buffer would save
+        nothing.
+        
+        Args:
+            emails (list): List of (subject, body) tuples
+            
+        Returns:
+            list: One (is_spam, confidence) tuple per email
+        """
+        return [self._classify_with_keywords(subject, body) for subject, body in emails]
+    
+    def _find_keywords(self, text, found):
+        """
+        Add the spam keywords contained in a piece of text to a set.
+        
+        Args:
+            text (str or bytes): Text to scan
+            found (set): Indices of keywords found so far
+            
+        Returns:
+            set: The updated found set
+        """
+        found.update(self._spam_set.Match(self._to_bytes(text)))
+        return found
+    
+    def _to_bytes(self, text):
+        """
+        Encode text as UTF-8 bytes, passing bytes through unchanged.
+        
+        Args:
+            text (str or bytes): Text to encode
+            
+        Returns:
+            bytes: Encoded text
+        """
+        if isinstance(text, str):
+            return text.encode('utf-8', 'ignore')
+        return text
+    
     # TODO: Implement OpenAI-based classification
     # def _classify_with_openai(self, subject, body):
     #     """
@@ -3,18 +3,68 @@ Gmail API Service Module
 
 Handles all interactions with the Gmail API including:
 - Fetching unread messages
-- Retrieving email content
+- Retrieving email content and metadata
 - Moving emails to trash
 """
 
 import base64
 import email
+import html
+import random
 from email.header import decode_header
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import time
 
 
+# Gmail accepts up to 100 calls per batch but recommends at most 50, since
+# larger batches quickly exceed the per-user rate limit
+MAX_BATCH_SIZE = 50
+
+# Attempts for messages rate limited inside a batch request
+MAX_BATCH_ATTEMPTS = 5
+
+# Upper bound for any single rate-limit backoff delay
+MAX_BACKOFF_SECONDS = 60
+
+# Maximum number of message IDs accepted by messages.batchModify
+MAX_BATCH_MODIFY_SIZE = 1000
+
+# Retries for rate-limit and server errors, with the client library's
+# built-in randomized exponential backoff
+NUM_RETRIES = 5
+
+# messages.get parameters for fetching only the headers and snippet,
+# trimmed further with a partial response
+METADATA_PARAMS = {
+    'format': 'metadata',
+    'metadataHeaders': ['Subject', 'From'],
+    'fields': 'id,snippet,payload/headers(name,value)',
+}
+
+
+def backoff_delay(attempt, retry_after=None, base=1.0):
+    """
+    Compute how long to wait before retrying a rate-limited call.
+    
+    The server's Retry-After header is honoured when present; otherwise the
+    delay doubles on every attempt (with jitter). Either way the delay is
+    capped at MAX_BACKOFF_SECONDS.
+    
+    Args:
+        attempt (int): Zero-based number of the attempt that failed
+        retry_after (str): Retry-After header value, if any
+        base (float): Initial backoff delay in seconds
+        
+    Returns:
+        float: Delay in seconds
+    """
+    if retry_after is not None:
+        delay = int(retry_after)
+    else:
+        delay = base * 2 ** attempt + random.uniform(0, 0.5)
+    return min(MAX_BACKOFF_SECONDS, delay)
+
+
 class GmailClient:
     """Client for interacting with Gmail API."""
     
@@ -25,8 +75,19 @@ class GmailClient:
         Args:
             credentials: Authenticated credentials object from auth.py
         """
+        # Imported lazily: the discovery module is slow to import
+        from googleapiclient.discovery import build
+        
         try:
-            self.service = build('gmail', 'v1', credentials=credentials)
+            # Use the discovery document bundled with the client library instead
+            # of fetching it over HTTPS on every start
+            self.service = build(
+                'gmail',
+                'v1',
+                credentials=credentials,
+                static_discovery=True,
+                cache_discovery=False
+            )
         except Exception as e:
             raise ConnectionError(f"Failed to build Gmail service: {e}")
     
@@ -48,7 +109,7 @@ class GmailClient:
                 userId='me',
                 q='is:unread',
                 maxResults=max_results
-            ).execute()
+            ).execute(num_retries=NUM_RETRIES)
             
             messages = results.get('messages', [])
             message_ids = [msg['id'] for msg in messages]
@@ -56,19 +117,11 @@ class GmailClient:
             return message_ids
             
         except HttpError as error:
-            if error.resp.status == 429:
-                # Rate limit exceeded
-                retry_after = error.resp.get('retry-after', 60)
-                print(f"Rate limit exceeded. Waiting {retry_after} seconds...")
-                time.sleep(int(retry_after))
-                # Retry once
-                return self.fetch_unread_messages(max_results)
-            else:
-                raise HttpError(
-                    error.resp,
-                    error.content,
-                    f"Failed to fetch unread messages: {error}"
-                )
+            raise HttpError(
+                error.resp,
+                error.content,
+                f"Failed to fetch unread messages: {error}"
+            )
         except Exception as e:
             raise ConnectionError(f"Connection error while fetching messages: {e}")
     
@@ -82,7 +135,7 @@ class GmailClient:
         Returns:
             dict: Dictionary containing:
                 - subject (str): Email subject
-                - body (str): Email body (text/plain preferred, falls back to text/html)
+                - body (bytes): Email body (text/plain preferred, falls back to text/html)
                 - snippet (str): Email snippet
                 - from_email (str): Sender email address
                 
@@ -94,47 +147,207 @@ class GmailClient:
                 userId='me',
                 id=message_id,
                 format='full'
-            ).execute()
+            ).execute(num_retries=NUM_RETRIES)
             
-            # Extract headers
-            headers = message['payload'].get('headers', [])
-            subject = ''
-            from_email = ''
+            return self._parse_message(message)
             
-            for header in headers:
-                if header['name'].lower() == 'subject':
-                    subject = self._decode_header(header['value'])
-                elif header['name'].lower() == 'from':
-                    from_email = header['value']
+        except HttpError as error:
+            raise HttpError(
+                error.resp,
+                error.content,
+                f"Failed to get email content for message {message_id}: {error}"
+            )
+        except Exception as e:
+            raise ConnectionError(f"Connection error while getting email content: {e}")
+    
+    def get_email_metadata(self, message_id):
+        """
+        Retrieve only the subject, sender and snippet of an email.
+        
+        Uses the metadata format with a partial response, so the MIME body is
+        never downloaded or decoded.
+        
+        Args:
+            message_id (str): Gmail message ID
+            
+        Returns:
+            dict: Same keys as get_email_content(), with an empty body
+                
+        Raises:
+            HttpError: If API call fails
+        """
+        try:
+            message = self.service.users().messages().get(
+                userId='me',
+                id=message_id,
+                **METADATA_PARAMS
+            ).execute(num_retries=NUM_RETRIES)
+            
+            return self._parse_message(message)
+            
+        except HttpError as error:
+            raise HttpError(
+                error.resp,
+                error.content,
+                f"Failed to get email metadata for message {message_id}: {error}"
+            )
+        except Exception as e:
+            raise ConnectionError(f"Connection error while getting email metadata: {e}")
+    
+    def get_email_contents_batch(self, message_ids):
+        """
+        Retrieve and decode the content of several emails using batch requests.
+        
+        Messages are fetched through the Gmail batch endpoint, so each chunk of
+        up to MAX_BATCH_SIZE messages costs a single HTTP round trip.
+        
+        Args:
+            message_ids (list): Gmail message IDs
+            
+        Returns:
+            dict: Mapping of message ID to the same dictionary returned by
+                get_email_content(). Messages that could not be retrieved are
+                omitted.
+                
+        Raises:
+            HttpError: If a batch request fails as a whole
+        """
+        return self._get_messages_batch(message_ids, format='full')
+    
+    def get_email_metadata_batch(self, message_ids):
+        """
+        Retrieve the metadata of several emails using batch requests.
+        
+        Args:
+            message_ids (list): Gmail message IDs
             
-            # Extract body
-            body = self._extract_body(message['payload'])
+        Returns:
+            dict: Mapping of message ID to the same dictionary returned by
+                get_email_metadata(). Messages that could not be retrieved are
+                omitted.
+                
+        Raises:
+            HttpError: If a batch request fails as a whole
+        """
+        return self._get_messages_batch(message_ids, **METADATA_PARAMS)
+    
+    def _get_messages_batch(self, message_ids, **get_params):
+        """
+        Fetch messages in chunks of MAX_BATCH_SIZE through the batch endpoint.
+        
+        Errors for individual calls are reported to the batch callback rather
+        than raised, so messages rate limited within a batch are collected and
+        re-batched with exponential backoff. If the whole batch is rate
+        limited, only the current chunk is retried.
+        
+        Args:
+            message_ids (list): Gmail message IDs
+            **get_params: Extra parameters passed to messages.get
             
-            # Get snippet
-            snippet = message.get('snippet', '')
+        Returns:
+            dict: Mapping of message ID to parsed message dictionary
+        """
+        emails = {}
+        rate_limited = []
+        
+        def callback(request_id, response, exception):
+            if exception is not None:
+                if isinstance(exception, HttpError) and exception.resp.status == 429:
+                    rate_limited.append(request_id)
+                    return
+                print(f"Failed to get email content for message {request_id}: {exception}")
+                return
+            # The batch runs callbacks unguarded, so a bad message must not
+            # abort the callbacks for the rest of the batch
+            try:
+                emails[request_id] = self._parse_message(response)
+            except Exception as e:
+                print(f"Failed to get email content for message {request_id}: {e}")
+        
+        try:
+            for start in range(0, len(message_ids), MAX_BATCH_SIZE):
+                pending = message_ids[start:start + MAX_BATCH_SIZE]
+                
+                for attempt in range(MAX_BATCH_ATTEMPTS):
+                    rate_limited.clear()
+                    retry_after = None
+                    batch = self.service.new_batch_http_request(callback=callback)
+                    for message_id in pending:
+                        batch.add(
+                            self.service.users().messages().get(
+                                userId='me',
+                                id=message_id,
+                                **get_params
+                            ),
+                            request_id=message_id
+                        )
+                    try:
+                        batch.execute()
+                    except HttpError as error:
+                        if error.resp.status != 429:
+                            raise
+                        # The whole batch was rejected; retry just this chunk
+                        retry_after = error.resp.get('retry-after')
+                        rate_limited[:] = pending
+                    
+                    if not rate_limited:
+                        break
+                    pending = list(rate_limited)
+                    if attempt == MAX_BATCH_ATTEMPTS - 1:
+                        for message_id in pending:
+                            print(f"Failed to get email content for message {message_id}: rate limit exceeded")
+                        break
+                    
+                    delay = backoff_delay(attempt, retry_after)
+                    print(f"Rate limit exceeded for {len(pending)} message(s). Waiting {delay:.1f} seconds...")
+                    time.sleep(delay)
             
-            return {
-                'subject': subject,
-                'body': body,
-                'snippet': snippet,
-                'from_email': from_email
-            }
+            return emails
             
         except HttpError as error:
-            if error.resp.status == 429:
-                retry_after = error.resp.get('retry-after', 60)
-                print(f"Rate limit exceeded. Waiting {retry_after} seconds...")
-                time.sleep(int(retry_after))
-                # Retry once
-                return self.get_email_content(message_id)
-            else:
-                raise HttpError(
-                    error.resp,
-                    error.content,
-                    f"Failed to get email content for message {message_id}: {error}"
-                )
+            raise HttpError(
+                error.resp,
+                error.content,
+                f"Failed to get email contents in batch: {error}"
+            )
         except Exception as e:
-            raise ConnectionError(f"Connection error while getting email content: {e}")
+            raise ConnectionError(f"Connection error while getting email contents: {e}")
+    
+    def _parse_message(self, message):
+        """
+        Extract subject, sender, body and snippet from a Gmail message resource.
+        
+        Args:
+            message (dict): Message resource returned by the Gmail API
+            
+        Returns:
+            dict: Dictionary containing subject, body, snippet and from_email
+        """
+        # Extract headers
+        payload = message.get('payload', {})
+        headers = payload.get('headers', [])
+        wanted = {'subject': '', 'from': ''}
+        
+        for header in headers:
+            name = header['name']
+            if name in ('Subject', 'From') or name.lower() in wanted:
+                wanted[name.lower()] = header['value']
+        
+        subject = self._decode_header(wanted['subject'])
+        from_email = wanted['from']
+        
+        # Extract body
+        body = self._extract_body(payload)
+        
+        # Get snippet (Gmail returns it HTML-escaped, e.g. &#39; for ')
+        snippet = html.unescape(message.get('snippet', ''))
+        
+        return {
+            'subject': subject,
+            'body': body,
+            'snippet': snippet,
+            'from_email': from_email
+        }
     
     def _decode_header(self, header_value):
         """
@@ -146,6 +359,11 @@ class GmailClient:
         Returns:
             str: Decoded header value
         """
+        # RFC 2047 encoded-words always start with '=?'; plain headers need
+        # no decoding
+        if '=?' not in header_value:
+            return header_value
+        
         try:
             decoded_parts = decode_header(header_value)
             decoded_string = ''
@@ -169,9 +387,9 @@ class GmailClient:
             payload: Message payload from Gmail API
             
         Returns:
-            str: Decoded email body
+            bytes: Decoded email body, left undecoded from UTF-8
         """
-        body = ''
+        body = b''
         
         # Check if message has parts (multipart)
         if 'parts' in payload:
@@ -181,48 +399,45 @@ class GmailClient:
                 if mime_type == 'text/plain':
                     data = part.get('body', {}).get('data', '')
                     if data:
-                        body = self._decode_base64url(data)
+                        body = self._decode_base64url_bytes(data)
                         break
                 elif mime_type == 'text/html' and not body:
                     # Fallback to HTML if no plain text found
                     data = part.get('body', {}).get('data', '')
                     if data:
-                        body = self._decode_base64url(data)
+                        body = self._decode_base64url_bytes(data)
         else:
             # Single part message
             mime_type = payload.get('mimeType', '')
             if mime_type in ['text/plain', 'text/html']:
                 data = payload.get('body', {}).get('data', '')
                 if data:
-                    body = self._decode_base64url(data)
+                    body = self._decode_base64url_bytes(data)
         
         return body
     
-    def _decode_base64url(self, data):
+    def _decode_base64url_bytes(self, data):
         """
-        Decode base64url encoded string.
+        Decode base64url encoded string to raw bytes.
+        
+        The result is not decoded as UTF-8: the classifier matches its ASCII
+        keywords against bytes directly.
         
         Args:
             data (str): Base64url encoded string
             
         Returns:
-            str: Decoded string
+            bytes: Decoded bytes
         """
         try:
             # Add padding if needed
-            padding = 4 - len(data) % 4
-            if padding != 4:
-                data += '=' * padding
+            data += '=' * (-len(data) % 4)
             
-            # Replace URL-safe characters
-            data = data.replace('-', '+').replace('_', '/')
-            
-            # Decode
-            decoded_bytes = base64.b64decode(data)
-            return decoded_bytes.decode('utf-8', errors='ignore')
+            # Decode, translating the URL-safe alphabet in C
+            return base64.urlsafe_b64decode(data)
         except Exception as e:
             print(f"Error decoding base64: {e}")
-            return ''
+            return b''
     
     def move_to_trash(self, message_id):
         """
@@ -245,22 +460,48 @@ class GmailClient:
                     'addLabelIds': ['TRASH'],
                     'removeLabelIds': ['INBOX']
                 }
-            ).execute()
+            ).execute(num_retries=NUM_RETRIES)
             
             return result
             
         except HttpError as error:
-            if error.resp.status == 429:
-                retry_after = error.resp.get('retry-after', 60)
-                print(f"Rate limit exceeded. Waiting {retry_after} seconds...")
-                time.sleep(int(retry_after))
-                # Retry once
-                return self.move_to_trash(message_id)
-            else:
-                raise HttpError(
-                    error.resp,
-                    error.content,
-                    f"Failed to move message {message_id} to trash: {error}"
-                )
+            raise HttpError(
+                error.resp,
+                error.content,
+                f"Failed to move message {message_id} to trash: {error}"
+            )
+        except Exception as e:
+            raise ConnectionError(f"Connection error while moving to trash: {e}")
+    
+    def batch_move_to_trash(self, message_ids):
+        """
+        Move several emails to trash with messages.batchModify.
+        
+        Each chunk of up to MAX_BATCH_MODIFY_SIZE messages is relabelled in a
+        single API call instead of one modify call per message.
+        
+        Args:
+            message_ids (list): Gmail message IDs
+            
+        Raises:
+            HttpError: If API call fails
+        """
+        try:
+            for start in range(0, len(message_ids), MAX_BATCH_MODIFY_SIZE):
+                self.service.users().messages().batchModify(
+                    userId='me',
+                    body={
+                        'ids': message_ids[start:start + MAX_BATCH_MODIFY_SIZE],
+                        'addLabelIds': ['TRASH'],
+                        'removeLabelIds': ['INBOX']
+                    }
+                ).execute(num_retries=NUM_RETRIES)
+            
+        except HttpError as error:
+            raise HttpError(
+                error.resp,
+                error.content,
+                f"Failed to move {len(message_ids)} message(s) to trash: {error}"
+            )
         except Exception as e:
             raise ConnectionError(f"Connection error while moving to trash: {e}")
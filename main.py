@@ -9,9 +9,10 @@ Orchestrates the email filtering workflow:
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from auth import authenticate
-from gmail_service import GmailClient
+from gmail_service import GmailClient, MAX_BATCH_SIZE
 from classifier import EmailClassifier
 from googleapiclient.errors import HttpError
 
@@ -20,9 +21,88 @@ from googleapiclient.errors import HttpError
 DRY_RUN = True
 
 
-def main():
+def fetch_messages(gmail_client, message_ids):
+    """
+    Fetch the subject and snippet of messages for classification.
+    
+    Messages are fetched in metadata format, so no MIME body is downloaded or
+    decoded. The full body is only fetched for messages with an empty snippet.
+    
+    Args:
+        gmail_client (GmailClient): Authenticated Gmail client
+        message_ids (list): Gmail message IDs
+        
+    Returns:
+        dict: Mapping of message ID to email data. Messages that could not be
+            retrieved are omitted.
+    """
+    emails = gmail_client.get_email_metadata_batch(message_ids)
+    
+    empty_snippet_ids = [
+        message_id for message_id, email_data in emails.items()
+        if not email_data['snippet']
+    ]
+    if empty_snippet_ids:
+        emails.update(gmail_client.get_email_contents_batch(empty_snippet_ids))
+    
+    return emails
+
+
+def classify_messages(gmail_client, classifier, message_ids):
+    """
+    Fetch and classify messages, overlapping network and CPU work.
+    
+    Messages are processed in chunks of MAX_BATCH_SIZE. While one chunk is
+    classified on the main thread, the next one is fetched on a worker
+    thread. All API calls stay on that single worker because the underlying
+    httplib2 transport is not thread-safe.
+    
+    Args:
+        gmail_client (GmailClient): Authenticated Gmail client
+        classifier (EmailClassifier): Email classifier
+        message_ids (list): Gmail message IDs
+        
+    Returns:
+        dict: Mapping of message ID to (email_data, is_spam, confidence).
+            Messages that could not be retrieved are omitted.
+    """
+    chunks = [
+        message_ids[start:start + MAX_BATCH_SIZE]
+        for start in range(0, len(message_ids), MAX_BATCH_SIZE)
+    ]
+    results = {}
+    
+    if not chunks:
+        return results
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch_messages, gmail_client, chunks[0])
+        
+        for next_chunk in chunks[1:] + [None]:
+            emails = future.result()
+            
+            # Start fetching the next chunk before classifying this one
+            if next_chunk is not None:
+                future = executor.submit(fetch_messages, gmail_client, next_chunk)
+            
+            classifications = classifier.analyze_emails([
+                (email_data['subject'], email_data['snippet'] or email_data['body'])
+                for email_data in emails.values()
+            ])
+            
+            for (message_id, email_data), (is_spam, confidence) in zip(emails.items(), classifications):
+                results[message_id] = (email_data, is_spam, confidence)
+    
+    return results
+
+
+def main(credentials=None):
     """
     Main function that orchestrates the email filtering process.
+    
+    Args:
+        credentials: Optional authenticated credentials to reuse when called
+            as a library; authenticates via auth.py when omitted
     """
     print("=" * 60)
     print("Gmail Email Filter Automation")
@@ -35,7 +115,8 @@ def main():
     # Authenticate with Gmail API
     try:
         print("\n[1/5] Authenticating with Gmail API...")
-        credentials = authenticate()
+        if credentials is None:
+            credentials = authenticate()
         print("✓ Authentication successful")
     except FileNotFoundError as e:
         print(f"✗ Authentication failed: {e}")
@@ -74,6 +155,9 @@ def main():
         if not message_ids:
             print("\nNo unread messages to process. Exiting.")
             return
+        
+        results = classify_messages(gmail_client, classifier, message_ids)
+        print(f"✓ Retrieved and classified {len(results)} message(s)")
             
     except HttpError as e:
         print(f"✗ Failed to fetch messages: {e}")
@@ -89,67 +173,63 @@ def main():
     spam_count = 0
     safe_count = 0
     error_count = 0
+    spam_ids = []
     
     for i, message_id in enumerate(message_ids, 1):
         try:
             print(f"\n[{i}/{len(message_ids)}] Processing message {message_id[:10]}...")
             
-            # Get email content
-            try:
-                email_data = gmail_client.get_email_content(message_id)
-                subject = email_data.get('subject', '(No Subject)')
-                from_email = email_data.get('from_email', 'Unknown')
-                
-                print(f"  From: {from_email}")
-                print(f"  Subject: {subject[:50]}...")
-                
-            except HttpError as e:
-                print(f"  ✗ Failed to get email content: {e}")
-                error_count += 1
-                continue
-            except Exception as e:
-                print(f"  ✗ Error getting email content: {e}")
+            # Get classification result
+            result = results.get(message_id)
+            if result is None:
+                print(f"  ✗ Failed to get email content")
                 error_count += 1
                 continue
             
-            # Classify email
-            try:
-                is_spam, confidence = classifier.analyze_email(
-                    email_data['subject'],
-                    email_data['body']
-                )
+            email_data, is_spam, confidence = result
+            subject = email_data.get('subject', '(No Subject)')
+            from_email = email_data.get('from_email', 'Unknown')
+            
+            print(f"  From: {from_email}")
+            print(f"  Subject: {subject[:50]}...")
+            
+            if is_spam:
+                spam_count += 1
+                print(f"  🚨 Classified as SPAM (confidence: {confidence:.2%})")
                 
-                if is_spam:
-                    spam_count += 1
-                    print(f"  🚨 Classified as SPAM (confidence: {confidence:.2%})")
-                    
-                    # Move to trash or simulate
-                    if DRY_RUN:
-                        print(f"  [DRY_RUN] Would move email {message_id} to trash")
-                    else:
-                        try:
-                            gmail_client.move_to_trash(message_id)
-                            print(f"  ✓ Moved to trash")
-                        except HttpError as e:
-                            print(f"  ✗ Failed to move to trash: {e}")
-                            error_count += 1
-                        except Exception as e:
-                            print(f"  ✗ Error moving to trash: {e}")
-                            error_count += 1
+                # Queue for trash or simulate
+                if DRY_RUN:
+                    print(f"  [DRY_RUN] Would move email {message_id} to trash")
                 else:
-                    safe_count += 1
-                    print(f"  ✓ Classified as SAFE (confidence: {confidence:.2%})")
-                    
-            except Exception as e:
-                print(f"  ✗ Classification error: {e}")
-                error_count += 1
-                continue
+                    spam_ids.append(message_id)
+            else:
+                safe_count += 1
+                print(f"  ✓ Classified as SAFE (confidence: {confidence:.2%})")
                 
         except Exception as e:
             print(f"  ✗ Unexpected error processing message: {e}")
             error_count += 1
             continue
     
+    # Move all spam to trash in a single batch request
+    if spam_ids:
+        print("\n" + "-" * 60)
+        print(f"Moving {len(spam_ids)} spam email(s) to trash...")
+        try:
+            gmail_client.batch_move_to_trash(spam_ids)
+            print("✓ Moved to trash")
+        except Exception as e:
+            print(f"✗ Batch move failed ({e}), moving emails individually...")
+            for message_id in spam_ids:
+                try:
+                    gmail_client.move_to_trash(message_id)
+                except HttpError as e:
+                    print(f"  ✗ Failed to move {message_id} to trash: {e}")
+                    error_count += 1
+                except Exception as e:
+                    print(f"  ✗ Error moving {message_id} to trash: {e}")
+                    error_count += 1
+    
     # Summary
     print("\n" + "=" * 60)
     print("Processing Complete")